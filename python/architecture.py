@@ -2883,27 +2883,52 @@ class InstructionTextToken:
 			)
 		return result
 
+	@staticmethod
+	def _set_core_struct(result: core.BNInstructionTextToken, token: 'InstructionTextToken') -> None:
+		result.type = token.type
+		result.text = token.text
+		result.width = token.width
+		result.value = token.value
+		result.size = token.size
+		result.operand = token.operand
+		result.context = token.context
+		result.confidence = token.confidence
+		result.address = token.address
+		result.namesCount = len(token.typeNames)
+		result.typeNames = (ctypes.c_char_p * len(token.typeNames))()
+		result.exprIndex = token.il_expr_index
+		for i in range(len(token.typeNames)):
+			result.typeNames[i] = token.typeNames[i].encode("utf-8")
+
 	@staticmethod
 	def _get_core_struct(tokens: List['InstructionTextToken']) -> 'ctypes.Array[core.BNInstructionTextToken]':
 		""" Helper method for converting between core.BNInstructionTextToken and InstructionTextToken lists """
 		result = (core.BNInstructionTextToken * len(tokens))()
 		for j in range(len(tokens)):
-			result[j].type = tokens[j].type
-			result[j].text = tokens[j].text
-			result[j].width = tokens[j].width
-			result[j].value = tokens[j].value
-			result[j].size = tokens[j].size
-			result[j].operand = tokens[j].operand
-			result[j].context = tokens[j].context
-			result[j].confidence = tokens[j].confidence
-			result[j].address = tokens[j].address
-			result[j].namesCount = len(tokens[j].typeNames)
-			result[j].typeNames = (ctypes.c_char_p * len(tokens[j].typeNames))()
-			result[j].exprIndex = tokens[j].il_expr_index
-			for i in range(len(tokens[j].typeNames)):
-				result[j].typeNames[i] = tokens[j].typeNames[i].encode("utf-8")
+			InstructionTextToken._set_core_struct(result[j], tokens[j])
 		return result
 
+	@staticmethod
+	def _get_core_struct_batch(
+	    token_lists: List[List['InstructionTextToken']]
+	) -> Tuple['ctypes.Array[core.BNInstructionTextToken]', List[Tuple[Optional['ctypes._Pointer[core.BNInstructionTextToken]'], int]]]:
+		"""
+		Helper method for converting several InstructionTextToken lists into a single contiguous
+		core.BNInstructionTextToken array. Returns the backing array, which must be kept alive for as long
+		as the core may read from it, and a ``(pointer, count)`` pair for each input list.
+		"""
+		result = (core.BNInstructionTextToken * sum(len(tokens) for tokens in token_lists))()
+		set_core_struct = InstructionTextToken._set_core_struct
+		slices = []
+		k = 0
+		for tokens in token_lists:
+			count = len(tokens)
+			slices.append((ctypes.pointer(result[k]) if count > 0 else None, count))
+			for token in tokens:
+				set_core_struct(result[k], token)
+				k += 1
+		return result, slices
+
 	def __str__(self):
 		return self.text
 
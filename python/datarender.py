@@ -27,16 +27,60 @@ from . import filemetadata
 from . import binaryview
 from . import function
 from . import enums
-from .log import log_error
+from .log import log_error, log_warn
 from . import types
 from . import highlight
-from . import types
+
+
+_callbacks = core.BNCustomDataRenderer()
+_FREE_OBJECT_CFUNC = type(_callbacks.freeObject)
+_IS_VALID_FOR_DATA_CFUNC = type(_callbacks.isValidForData)
+_GET_LINES_FOR_DATA_CFUNC = type(_callbacks.getLinesForData)
+_FREE_LINES_CFUNC = type(_callbacks.freeLines)
+del _callbacks
+
+_BNGetFileForView = core.BNGetFileForView
+_BNNewViewReference = core.BNNewViewReference
+_BNNewTypeReference = core.BNNewTypeReference
+
+# instrIndex value for lines that are not associated with an IL instruction
+_NO_INSTR_INDEX = 0xffffffffffffffff
+
+# Assigning a NULL pointer object to a line's tokens drops the token array the line buffer was keeping alive
+_NULL_TOKENS = ctypes.POINTER(core.BNInstructionTextToken)()
+
+
+_COLOR_DISPATCH = {
+    enums.HighlightStandardColor: lambda c: highlight.HighlightColor(c)._to_core_struct(),
+    highlight.HighlightColor: lambda c: c._to_core_struct(),
+}
+
+
+def _coerce_color(color):
+	converter = _COLOR_DISPATCH.get(type(color))
+	if converter is not None:
+		return converter(color)
+	# Subclasses miss the exact-type lookup above
+	if isinstance(color, highlight.HighlightColor):
+		return color._to_core_struct()
+	if isinstance(color, enums.HighlightStandardColor):
+		return highlight.HighlightColor(color)._to_core_struct()
+	raise ValueError("Specified color is not one of HighlightStandardColor, highlight.HighlightColor")
 
 
 class TypeContext:
+	__slots__ = ('_type', '_offset', '_name')
+
 	def __init__(self, _type, _offset):
 		self._type = _type
 		self._offset = _offset
+		self._name = None
+
+	def _type_name(self):
+		# Repeated checks against the same context record only read the name from the core once
+		if self._name is None:
+			self._name = self._type.name
+		return self._name
 
 	@property
 	def type(self):
@@ -59,7 +103,8 @@ class DataRenderer:
 
 	The `perform_get_lines_for_data` method returns a list of `DisassemblyTextLine` objects each one
 	representing a single line of Linear View output. The `prefix` variable is a list of `InstructionTextToken`'s
-	which have already been generated by other `DataRenderer`'s.
+	which have already been generated by other `DataRenderer`'s. Lines should have their `address` set explicitly;
+	lines without one fall back to the address of their first token, which is slower to marshal to the core.
 
 	After defining the `DataRenderer` subclass you must then register it with the core. This is done by calling
 	either `register_type_specific` or `register_generic`. A "generic" type renderer is able to be overridden by
@@ -83,31 +128,100 @@ class DataRenderer:
 
 	Note that the formatting is sub-optimal to work around an issue with Sphinx and reStructured text
 	"""
-	_registered_renderers = []
+	_registered_renderers = set()
 
 	def __init__(self, context=None):
 		self._cb = core.BNCustomDataRenderer()
 		self._cb.context = context
-		self._cb.freeObject = self._cb.freeObject.__class__(self._free_object)
-		self._cb.isValidForData = self._cb.isValidForData.__class__(self._is_valid_for_data)
-		self._cb.getLinesForData = self._cb.getLinesForData.__class__(self._get_lines_for_data)
-		self._cb.freeLines = self._cb.freeLines.__class__(self._free_lines)
+		self._cb.freeObject = _FREE_OBJECT_CFUNC(self._free_object)
+		self._cb.isValidForData = _IS_VALID_FOR_DATA_CFUNC(self._is_valid_for_data)
+		self._cb.getLinesForData = _GET_LINES_FOR_DATA_CFUNC(self._get_lines_for_data)
+		self._cb.freeLines = _FREE_LINES_CFUNC(self._free_lines)
 		self.handle = core.BNCreateDataRenderer(self._cb)
+		self._last_context = ([], [])
+		self.line_buf = None
+		self._line_buf_capacity = 0
+		predicate = self.perform_is_valid_for_data
+		self._jit_predicate = predicate if getattr(predicate, "_is_jit_predicate", False) else None
 
 	@staticmethod
 	def is_type_of_struct_name(t, name, context):
-		return (
-		    t.type_class == enums.TypeClass.StructureTypeClass and len(context) > 0
-		    and isinstance(context[-1].type, types.NamedTypeReferenceType) and context[-1].type.name == name
-		)
+		if t.type_class != enums.TypeClass.StructureTypeClass or len(context) == 0:
+			return False
+		ctx = context[-1]
+		if not isinstance(ctx.type, types.NamedTypeReferenceType):
+			return False
+		if isinstance(ctx, TypeContext):
+			return ctx._type_name() == name
+		return ctx.type.name == name
+
+	@staticmethod
+	def jit_predicate(fn):
+		"""
+		``jit_predicate`` is a decorator for ``perform_is_valid_for_data`` implementations that only need
+		the numeric properties of the type being rendered. The decorated function is called as
+		``fn(type_class, width, addr)`` with plain integers, skipping construction of the BinaryView, Type
+		and context objects entirely. If numba is installed the function is compiled up front with
+		``numba.njit`` for ``(int64, int64, uint64)`` arguments, otherwise it runs as regular Python. If numba
+		fails to compile the function a warning is logged and the regular Python function is used.
+
+		In the below example a generic renderer claims every 4 byte integer::
+
+			class DwordRenderer(DataRenderer):
+				@DataRenderer.jit_predicate
+				def perform_is_valid_for_data(type_class, width, addr):
+					return type_class == TypeClass.IntegerTypeClass and width == 4
+
+			DwordRenderer().register_generic()
+		"""
+		try:
+			import numba
+		except ImportError:
+			numba = None
+		if numba is not None:
+			try:
+				fn = numba.njit((numba.int64, numba.int64, numba.uint64))(fn)
+			except Exception as e:
+				log_warn(f"Failed to compile {fn.__qualname__} with numba, falling back to Python: {e}")
+		fn._is_jit_predicate = True
+		return staticmethod(fn)
+
+	@staticmethod
+	def _wrap_view(view):
+		# Views opened from Python are already wrapped, so skip creating and releasing new core references
+		cached = binaryview.BinaryView._cached_instances.get(ctypes.addressof(view.contents))
+		if cached is not None:
+			return cached
+		file_metadata = filemetadata.FileMetadata(handle=_BNGetFileForView(view))
+		return binaryview.BinaryView(file_metadata=file_metadata, handle=_BNNewViewReference(view))
+
+	def _build_context(self, context, count, _new_type_reference=_BNNewTypeReference, _create_type=types.Type.create):
+		# Consecutive callbacks (e.g. elements of an array of structures) usually share the outer context
+		# entries, so reuse the wrappers built last time for the common prefix. The cached wrappers hold
+		# references to their types, so a matching handle address always refers to the same type.
+		last_handles, last_wrappers = self._last_context
+		entries = [context[i] for i in range(count)]
+		handles = [ctypes.addressof(entry.type.contents) for entry in entries]
+		shared = 0
+		limit = min(count, len(last_handles))
+		while (
+		    shared < limit and handles[shared] == last_handles[shared]
+		    and last_wrappers[shared].offset == entries[shared].offset
+		):
+			shared += 1
+		result = last_wrappers[:shared]
+		for entry in entries[shared:]:
+			result.append(TypeContext(_create_type(_new_type_reference(entry.type)), entry.offset))
+		self._last_context = (handles, result[:])
+		return result
 
 	def register_type_specific(self):
 		core.BNRegisterTypeSpecificDataRenderer(core.BNGetDataRendererContainer(), self.handle)
-		self.__class__._registered_renderers.append(self)
+		self.__class__._registered_renderers.add(self)
 
 	def register_generic(self):
 		core.BNRegisterGenericDataRenderer(core.BNGetDataRendererContainer(), self.handle)
-		self.__class__._registered_renderers.append(self)
+		self.__class__._registered_renderers.add(self)
 
 	def _free_object(self, ctxt):
 		try:
@@ -117,14 +231,11 @@ class DataRenderer:
 
 	def _is_valid_for_data(self, ctxt, view, addr, type, context, ctxCount):
 		try:
-			file_metadata = filemetadata.FileMetadata(handle=core.BNGetFileForView(view))
-			view = binaryview.BinaryView(file_metadata=file_metadata, handle=core.BNNewViewReference(view))
-			type = types.Type.create(handle=core.BNNewTypeReference(type))
-			pycontext = []
-			for i in range(0, ctxCount):
-				pycontext.append(
-				    TypeContext(types.Type.create(core.BNNewTypeReference(context[i].type)), context[i].offset)
-				)
+			if self._jit_predicate is not None:
+				return bool(self._jit_predicate(core.BNGetTypeClass(type), core.BNGetTypeWidth(type), addr))
+			view = self._wrap_view(view)
+			type = types.Type.create(handle=_BNNewTypeReference(type))
+			pycontext = self._build_context(context, ctxCount)
 			return self.perform_is_valid_for_data(ctxt, view, addr, type, pycontext)
 		except:
 			log_error(traceback.format_exc())
@@ -132,54 +243,87 @@ class DataRenderer:
 
 	def _get_lines_for_data(self, ctxt, view, addr, type, prefix, prefixCount, width, count, typeCtx, ctxCount, language):
 		try:
-			file_metadata = filemetadata.FileMetadata(handle=core.BNGetFileForView(view))
-			view = binaryview.BinaryView(file_metadata=file_metadata, handle=core.BNNewViewReference(view))
-			type = types.Type.create(handle=core.BNNewTypeReference(type))
+			view = self._wrap_view(view)
+			type = types.Type.create(handle=_BNNewTypeReference(type))
+
+			if prefixCount == 0 and ctxCount == 0:
+				result = self.perform_get_lines_for_data_with_language(ctxt, view, addr, type, [], width, [], language)
+				return self._set_lines_simple(result, count)
 
 			prefixTokens = function.InstructionTextToken._from_core_struct(prefix, prefixCount)
-			pycontext = []
-			for i in range(ctxCount):
-				pycontext.append(
-				    TypeContext(types.Type.create(core.BNNewTypeReference(typeCtx[i].type)), typeCtx[i].offset)
-				)
+			pycontext = self._build_context(typeCtx, ctxCount)
 
 			result = self.perform_get_lines_for_data_with_language(
 				ctxt, view, addr, type, prefixTokens, width, pycontext, language
 			)
-
-			count[0] = len(result)
-			self.line_buf = (core.BNDisassemblyTextLine * len(result))()
-			for i in range(len(result)):
-				line = result[i]
-				color = line.highlight
-				if not isinstance(color,
-				                  enums.HighlightStandardColor) and not isinstance(color, highlight.HighlightColor):
-					raise ValueError("Specified color is not one of HighlightStandardColor, highlight.HighlightColor")
-				if isinstance(color, enums.HighlightStandardColor):
-					color = highlight.HighlightColor(color)
-				self.line_buf[i].highlight = color._to_core_struct()
-				if line.address is None:
-					if len(line.tokens) > 0:
-						self.line_buf[i].addr = line.tokens[0].address
-					else:
-						self.line_buf[i].addr = 0
-				else:
-					self.line_buf[i].addr = line.address
-				if line.il_instruction is not None:
-					self.line_buf[i].instrIndex = line.il_instruction.instr_index
-				else:
-					self.line_buf[i].instrIndex = 0xffffffffffffffff
-
-				self.line_buf[i].count = len(line.tokens)
-				self.line_buf[i].tokens = function.InstructionTextToken._get_core_struct(line.tokens)
-
-			return ctypes.cast(self.line_buf, ctypes.c_void_p).value
+			return self._set_lines(result, count)
 		except:
 			log_error(traceback.format_exc())
 			return None
 
+	def _reserve_lines(self, n):
+		# The line buffer is kept between callbacks and only grows, so steady state rendering does not
+		# allocate a new array per call. Every field the core reads is rewritten for each line used.
+		if self.line_buf is None or n > self._line_buf_capacity:
+			self._line_buf_capacity = max(n, self._line_buf_capacity * 2, 1)
+			self.line_buf = (core.BNDisassemblyTextLine * self._line_buf_capacity)()
+		return self.line_buf
+
+	def _set_lines(self, result, count):
+		n = len(result)
+		highlights = [_coerce_color(line.highlight) for line in result]
+		addresses = [
+		    (line.tokens[0].address if len(line.tokens) > 0 else 0) if line.address is None else line.address
+		    for line in result
+		]
+		instr_indices = [
+		    _NO_INSTR_INDEX if line.il_instruction is None else line.il_instruction.instr_index for line in result
+		]
+		token_buf, tokens = function.InstructionTextToken._get_core_struct_batch([line.tokens for line in result])
+
+		line_buf = self._reserve_lines(n)
+		for i in range(n):
+			buf = line_buf[i]
+			buf.highlight = highlights[i]
+			buf.addr = addresses[i]
+			buf.instrIndex = instr_indices[i]
+			buf.tokens, buf.count = tokens[i]
+
+		count[0] = n
+		self._token_buf = token_buf
+		return ctypes.addressof(self.line_buf)
+
+	def _set_lines_simple(self, result, count):
+		# Specialization of _set_lines for lines with an explicit address and no IL instruction, which is
+		# what renderers without a prefix or context almost always produce
+		n = len(result)
+		line_buf = self._reserve_lines(n)
+		for i in range(n):
+			line = result[i]
+			if line.address is None or line.il_instruction is not None:
+				return self._set_lines(result, count)
+			buf = line_buf[i]
+			buf.highlight = _coerce_color(line.highlight)
+			buf.addr = line.address
+			buf.instrIndex = _NO_INSTR_INDEX
+
+		token_buf, tokens = function.InstructionTextToken._get_core_struct_batch([line.tokens for line in result])
+		for i in range(n):
+			buf = line_buf[i]
+			buf.tokens, buf.count = tokens[i]
+
+		count[0] = n
+		self._token_buf = token_buf
+		return ctypes.addressof(self.line_buf)
+
 	def _free_lines(self, ctxt, lines, count):
-		self.line_buf = None
+		# The persistent line buffer holds references to the token arrays it points at, so clear the
+		# slots used by the last callback to release them
+		line_buf = self.line_buf
+		if line_buf is not None:
+			for i in range(min(count, self._line_buf_capacity)):
+				line_buf[i].tokens = _NULL_TOKENS
+		self._token_buf = None
 
 	def perform_free_object(self, ctxt):
 		pass
@@ -20,8 +20,10 @@
 # IN THE SOFTWARE.
 
 import ctypes
+import sys
+import weakref
 from dataclasses import dataclass
-from typing import Callable, Union, Optional
+from typing import Callable, Iterator, Union, Optional
 from .binaryview import BinaryView, Section, DataVariable
 from .variable import RegisterValue
 from .enums import (
@@ -33,6 +35,81 @@ from .enums import (
 from .function import Function
 from . import _binaryninjacore as core
 
+# Slotted dataclasses need Python 3.10
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+_PDevice = ctypes.POINTER(core.BNFirmwareNinjaDevice)
+_PSection = ctypes.POINTER(core.BNFirmwareNinjaSection)
+_PDeviceAccesses = ctypes.POINTER(core.BNFirmwareNinjaDeviceAccesses)
+_PCharP = ctypes.POINTER(ctypes.c_char_p)
+_PMA = ctypes.POINTER(core.BNFirmwareNinjaMemoryAccess)
+_PPMA = ctypes.POINTER(_PMA)
+_PFMA = ctypes.POINTER(core.BNFirmwareNinjaFunctionMemoryAccesses)
+_PPFMA = ctypes.POINTER(_PFMA)
+
+_ProgressFunction = ctypes.CFUNCTYPE(ctypes.c_bool, ctypes.c_void_p,
+                                     ctypes.c_ulonglong, ctypes.c_ulonglong)
+_NO_PROGRESS = _ProgressFunction(lambda ctxt, cur, total: True)
+
+
+def _as_array(pointer, count: int):
+    """View ``count`` elements starting at ``pointer`` as a ctypes array without copying"""
+    if count <= 0:
+        return ()
+    return ctypes.cast(pointer, ctypes.POINTER(pointer._type_ * count)).contents
+
+
+def _iter_then_free(items, free, *args):
+    """Yield from ``items``, then call ``free(*args)`` once the iterator is exhausted, closed or garbage collected"""
+
+    def generate():
+        try:
+            yield from items
+        finally:
+            finalizer()
+
+    result = generate()
+    finalizer = weakref.finalize(result, free, *args)
+    finalizer.atexit = False
+    return result
+
+
+def _device_list(devices, count: int) -> list["FirmwareNinjaDevice"]:
+    device_list = []
+    append = device_list.append
+    device = FirmwareNinjaDevice
+    for d in _as_array(devices, count):
+        start = d.start
+        append(device(d.name, start, d.end - start, d.info))
+
+    return device_list
+
+
+def _device_ndarray(devices, count: int) -> "numpy.ndarray":
+    import numpy
+
+    result = numpy.empty(count, dtype=[("name", object), ("start", "<u8"), ("size", "<u8"), ("info", object)])
+    if count <= 0:
+        return result
+
+    # View the integer columns of the core's BNFirmwareNinjaDevice array directly
+    device_struct = core.BNFirmwareNinjaDevice
+    raw_dtype = numpy.dtype({
+        "names": ["start", "end"],
+        "formats": ["<u8", "<u8"],
+        "offsets": [device_struct.start.offset, device_struct.end.offset],
+        "itemsize": ctypes.sizeof(device_struct),
+    })
+    raw_buffer = (ctypes.c_char * (raw_dtype.itemsize * count)).from_address(ctypes.addressof(devices.contents))
+    raw = numpy.frombuffer(raw_buffer, dtype=raw_dtype, count=count)
+    result["start"] = raw["start"]
+    result["size"] = raw["end"] - raw["start"]
+
+    elements = _as_array(devices, count)
+    result["name"] = [d.name for d in elements]
+    result["info"] = [d.info for d in elements]
+    return result
+
 
 class FirmwareNinjaReferenceNode:
     """
@@ -103,12 +180,12 @@ class FirmwareNinjaReferenceNode:
         :rtype: DataVariable
         """
 
-        try:
-            bn_data_var = core.BNFirmwareNinjaReferenceNodeGetDataVariable(
-                self._handle)
-            if not bn_data_var:
-                return None
+        bn_data_var = core.BNFirmwareNinjaReferenceNodeGetDataVariable(
+            self._handle)
+        if not bn_data_var:
+            return None
 
+        try:
             data_var = DataVariable.from_core_struct(bn_data_var.contents, self._view)
         finally:
             core.BNFreeDataVariable(bn_data_var)
@@ -123,23 +200,30 @@ class FirmwareNinjaReferenceNode:
         :rtype: list[FirmwareNinjaReferenceNode]
         """
 
-        count = ctypes.c_ulonglong(0)
-        nodes = []
-        try:
-            bn_nodes = core.BNFirmwareNinjaReferenceNodeGetChildren(
-                self._handle, count)
-            for i in range(count.value):
-                nodes.append(
-                    FirmwareNinjaReferenceNode(
-                        core.BNNewFirmwareNinjaReferenceNodeReference(
-                            bn_nodes[i]), self._view))
-        finally:
-            core.BNFreeFirmwareNinjaReferenceNodes(bn_nodes, count.value)
+        return list(self.iter_children())
 
-        return nodes
+    def iter_children(self) -> Iterator['FirmwareNinjaReferenceNode']:
+        """
+        ``iter_children`` iterates over the child reference tree nodes, creating each node only when it is reached.
+        The core's child list is released once the iterator is exhausted, closed or garbage collected.
 
+        :return: Iterator over the child nodes contained in the reference tree node
+        :rtype: Iterator[FirmwareNinjaReferenceNode]
+        """
 
-@dataclass
+        count = ctypes.c_ulonglong(0)
+        bn_nodes = core.BNFirmwareNinjaReferenceNodeGetChildren(
+            self._handle, count)
+        n = count.value
+        new_reference = core.BNNewFirmwareNinjaReferenceNodeReference
+        node = FirmwareNinjaReferenceNode
+        view = self._view
+        return _iter_then_free(
+            (node(new_reference(handle), view) for handle in _as_array(bn_nodes, n)),
+            core.BNFreeFirmwareNinjaReferenceNodes, bn_nodes, n)
+
+
+@dataclass(frozen=True, **_SLOTS)
 class FirmwareNinjaDevice:
     """
     ``class FirmwareNinjaDevice`` is a class that stores information about a hardware device, including the device
@@ -152,7 +236,7 @@ class FirmwareNinjaDevice:
     info: str
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class FirmwareNinjaSection:
     """
     ``class FirmwareNinjaSection`` is a class that stores information about a section identified with Firmware Ninja
@@ -165,29 +249,87 @@ class FirmwareNinjaSection:
     entropy: float
 
 
+class _LazyRegisterValue:
+    """
+    Dataclass field descriptor that stores a raw ``BNRegisterValue`` and converts it to a ``RegisterValue`` the first
+    time the field is read
+    """
+
+    def __set_name__(self, owner, name):
+        self._name = "_" + name
+        self._raw_name = "_raw_" + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            # Makes the dataclass field required rather than defaulting to the descriptor
+            raise AttributeError(self._name[1:])
+        raw = getattr(instance, self._raw_name)
+        if raw is not None:
+            setattr(instance, self._name, RegisterValue.from_BNRegisterValue(raw))
+            setattr(instance, self._raw_name, None)
+        return getattr(instance, self._name)
+
+    def __set__(self, instance, value):
+        setattr(instance, self._name, value)
+        setattr(instance, self._raw_name, None)
+
+
 @dataclass
 class FirmwareNinjaMemoryAccess:
     """
     ``class FirmwareNinjaMemoryAccess`` is a class that stores information on instructions that access regions of
     memory that are not file-backed, such as memory-mapped I/O and RAM.
+
+    When read from the core, ``mem_address`` and ``value`` are kept as raw register values and only converted to
+    ``RegisterValue`` objects the first time they are accessed.
     """
 
+    # Declared by hand as ``slots=True`` would replace the lazy field descriptors with plain slots
+    __slots__ = ("instr_address", "heuristic", "type", "_mem_address", "_value", "_raw_mem_address", "_raw_value")
+
     instr_address: int
-    mem_address: RegisterValue
+    mem_address: RegisterValue = _LazyRegisterValue()
     heuristic: FirmwareNinjaMemoryHeuristic
     type: FirmwareNinjaMemoryAccessType
-    value: RegisterValue
+    value: RegisterValue = _LazyRegisterValue()
+
+    @classmethod
+    def _from_raw(
+        cls, instr_address: int, raw_mem_address: core.BNRegisterValue, heuristic: FirmwareNinjaMemoryHeuristic,
+        type: FirmwareNinjaMemoryAccessType, raw_value: core.BNRegisterValue
+    ) -> "FirmwareNinjaMemoryAccess":
+        # The raw register values must be copies that do not reference core-owned memory
+        result = cls.__new__(cls)
+        result.instr_address = instr_address
+        result.heuristic = heuristic
+        result.type = type
+        result._mem_address = None
+        result._value = None
+        result._raw_mem_address = raw_mem_address
+        result._raw_value = raw_value
+        return result
+
+    def _mem_address_to_core_struct(self) -> core.BNRegisterValue:
+        if self._raw_mem_address is not None:
+            return self._raw_mem_address
+        return RegisterValue.to_BNRegisterValue(self._mem_address)
+
+    def _value_to_core_struct(self) -> core.BNRegisterValue:
+        if self._raw_value is not None:
+            return self._raw_value
+        return RegisterValue.to_BNRegisterValue(self._value)
 
     @classmethod
     def from_BNFirmwareNinjaMemoryAccess(
         cls, access: core.BNFirmwareNinjaMemoryAccess
     ) -> "FirmwareNinjaMemoryAccess":
-        return cls(
-            instr_address=access.instrAddress,
-            mem_address=RegisterValue.from_BNRegisterValue(access.memAddress),
-            heuristic=FirmwareNinjaMemoryHeuristic(access.heuristic),
-            type=FirmwareNinjaMemoryAccessType(access.type),
-            value=RegisterValue.from_BNRegisterValue(access.value),
+        copy_register_value = core.BNRegisterValue.from_buffer_copy
+        return cls._from_raw(
+            access.instrAddress,
+            copy_register_value(access.memAddress),
+            FirmwareNinjaMemoryHeuristic(access.heuristic),
+            FirmwareNinjaMemoryAccessType(access.type),
+            copy_register_value(access.value),
         )
 
     @classmethod
@@ -196,14 +338,14 @@ class FirmwareNinjaMemoryAccess:
     ) -> core.BNFirmwareNinjaMemoryAccess:
         return core.BNFirmwareNinjaMemoryAccess(
             instrAddress=access.instr_address,
-            memAddress=RegisterValue.to_BNRegisterValue(access.mem_address),
+            memAddress=access._mem_address_to_core_struct(),
             heuristic=access.heuristic,
             type=access.type,
-            value=RegisterValue.to_BNRegisterValue(access.value),
+            value=access._value_to_core_struct(),
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class FirmwareNinjaFunctionMemoryAccesses:
     """
     ``class FirmwareNinjaFunctionMemoryAccesses`` is a class that stores information on accesses made by a function
@@ -219,12 +361,19 @@ class FirmwareNinjaFunctionMemoryAccesses:
         info: core.BNFirmwareNinjaFunctionMemoryAccesses,
         view: BinaryView,
     ) -> "FirmwareNinjaFunctionMemoryAccesses":
-        accesses = []
-        for i in range(info.count):
-            access = info.accesses[i]
-            accesses.append(
-                FirmwareNinjaMemoryAccess.from_BNFirmwareNinjaMemoryAccess(
-                    access.contents))
+        # Equivalent to FirmwareNinjaMemoryAccess.from_BNFirmwareNinjaMemoryAccess, inlined as functions can
+        # have a large number of accesses
+        from_raw = FirmwareNinjaMemoryAccess._from_raw
+        copy_register_value = core.BNRegisterValue.from_buffer_copy
+        heuristic = FirmwareNinjaMemoryHeuristic
+        access_type = FirmwareNinjaMemoryAccessType
+        count = info.count
+        raw_accesses = info.accesses
+        accesses = [None] * count
+        for i in range(count):
+            a = raw_accesses[i].contents
+            accesses[i] = from_raw(a.instrAddress, copy_register_value(a.memAddress), heuristic(a.heuristic),
+                                   access_type(a.type), copy_register_value(a.value))
 
         return cls(
             function=view.get_function_at(info.start),
@@ -232,7 +381,7 @@ class FirmwareNinjaFunctionMemoryAccesses:
         )
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class FirmwareNinjaDeviceAccesses:
     """
     ``class FirmwareNinjaDeviceAccesses`` is a class that stores information on the number of accesses to hardware
@@ -262,10 +411,18 @@ class FirmwareNinja:
     def __init__(self, view: BinaryView) -> None:
         self._view = view
         self._handle = core.BNCreateFirmwareNinja(view.handle)
+        self._finalizer = weakref.finalize(self, core.BNFreeFirmwareNinja, self._handle)
+        # Never free core objects at interpreter exit, the core may already be shut down
+        self._finalizer.atexit = False
 
-    def __del__(self):
-        if core is not None:
-            core.BNFreeFirmwareNinja(self._handle)
+    @property
+    def _arch_handle(self):
+        # Read the default architecture handle directly rather than through ``BinaryView.arch``, which also looks up
+        # the Python wrapper. This is not cached as the architecture of the view can be changed at any time.
+        arch = core.BNGetDefaultArchitecture(self._view.handle)
+        if arch is None:
+            raise ValueError("Binary view has no architecture")
+        return arch
 
     def store_custom_device(self, name: str, start: int, size: int,
                             info: str) -> bool:
@@ -303,24 +460,29 @@ class FirmwareNinja:
         :rtype: list[FirmwareNinjaDevice]
         """
 
-        devices = ctypes.POINTER(core.BNFirmwareNinjaDevice)()
+        return self._query_custom_devices(_device_list)
+
+    def query_custom_devices_array(self) -> "numpy.ndarray":
+        """
+        ``query_custom_devices_array`` queries user-defined Firmware Ninja devices from the binary view metadata as a
+        NumPy structured array with ``name``, ``start``, ``size`` and ``info`` fields. The integer fields are copied
+        out of the core buffer in bulk, which avoids creating a Python object per device. Requires numpy.
+
+        :return: Structured array of Firmware Ninja devices
+        :rtype: numpy.ndarray
+        """
+
+        return self._query_custom_devices(_device_ndarray)
+
+    def _query_custom_devices(self, convert):
+        devices = _PDevice()
         count = core.BNFirmwareNinjaQueryCustomDevices(self._handle,
                                                        ctypes.byref(devices))
         if count == -1:
             raise RuntimeError("BNFirmwareNinjaQueryCustomDevices")
 
         try:
-            device_list = []
-            for i in range(count):
-                device_list.append(
-                    FirmwareNinjaDevice(
-                        name=devices[i].name,
-                        start=devices[i].start,
-                        size=devices[i].end - devices[i].start,
-                        info=devices[i].info,
-                    ))
-
-            return device_list
+            return convert(devices, count)
         finally:
             core.BNFirmwareNinjaFreeDevices(devices, count)
 
@@ -332,16 +494,14 @@ class FirmwareNinja:
         :rtype: list[str]
         """
 
-        boards = ctypes.POINTER(ctypes.c_char_p)()
+        boards = _PCharP()
         count = core.BNFirmwareNinjaQueryBoardNamesForArchitecture(
-            self._handle, self._view.arch.handle, ctypes.byref(boards))
+            self._handle, self._arch_handle, ctypes.byref(boards))
         if count == -1:
             raise RuntimeError("BNFirmwareNinjaQueryBoardNamesForArchitecture")
 
         try:
-            board_list = []
-            for i in range(count):
-                board_list.append(boards[i].decode("utf-8"))
+            board_list = [board.decode("utf-8") for board in _as_array(boards, count)]
 
             return board_list
         finally:
@@ -363,26 +523,37 @@ class FirmwareNinja:
         :rtype: list[FirmwareNinjaDevice]
         """
 
-        devices = ctypes.POINTER(core.BNFirmwareNinjaDevice)()
+        return self._query_devices_by_board_name(name, _device_list)
+
+    def query_devices_by_board_name_array(self, name: str) -> "numpy.ndarray":
+        """
+        ``query_devices_by_board_name_array`` queries the hardware device information for a specific board as a NumPy
+        structured array with ``name``, ``start``, ``size`` and ``info`` fields. Requires numpy.
+
+        :Example:
+
+            >>> fwn = FirmwareNinja(bv)
+            >>> devices = fwn.query_devices_by_board_name_array(fwn.query_board_names()[0])
+            >>> devices[devices["size"] >= 0x1000]["name"]
+
+        :param str name: Name of the board
+        :return: Structured array of Firmware Ninja devices
+        :rtype: numpy.ndarray
+        """
+
+        return self._query_devices_by_board_name(name, _device_ndarray)
+
+    def _query_devices_by_board_name(self, name: str, convert):
+        devices = _PDevice()
         count = core.BNFirmwareNinjaQueryBoardDevices(self._handle,
-                                                      self._view.arch.handle,
+                                                      self._arch_handle,
                                                       name,
                                                       ctypes.byref(devices))
         if count == -1:
             raise RuntimeError("BNFirmwareNinjaQueryBoardDevices")
 
         try:
-            device_list = []
-            for i in range(count):
-                device_list.append(
-                    FirmwareNinjaDevice(
-                        name=devices[i].name,
-                        start=devices[i].start,
-                        size=devices[i].end - devices[i].start,
-                        info=devices[i].info,
-                    ))
-
-            return device_list
+            return convert(devices, count)
         finally:
             core.BNFirmwareNinjaFreeDevices(devices, count)
 
@@ -413,7 +584,7 @@ class FirmwareNinja:
         :rtype: list[FirmwareNinjaSection]
         """
 
-        sections = ctypes.POINTER(core.BNFirmwareNinjaSection)()
+        sections = _PSection()
         count = core.BNFirmwareNinjaFindSectionsWithEntropy(
             self._handle,
             ctypes.byref(sections),
@@ -427,14 +598,12 @@ class FirmwareNinja:
 
         try:
             section_list = []
-            for i in range(count):
-                section_list.append(
-                    FirmwareNinjaSection(
-                        type=FirmwareNinjaSectionType(sections[i].type),
-                        start=sections[i].start,
-                        size=sections[i].end - sections[i].start,
-                        entropy=sections[i].entropy,
-                    ))
+            append = section_list.append
+            section = FirmwareNinjaSection
+            section_type = FirmwareNinjaSectionType
+            for sec in _as_array(sections, count):
+                start = sec.start
+                append(section(section_type(sec.type), start, sec.end - start, sec.entropy))
 
             return section_list
         finally:
@@ -453,59 +622,114 @@ class FirmwareNinja:
         :rtype: list[FirmwareNinjaFunctionMemoryAccesses]
         """
 
-        fma_info = ctypes.POINTER(
-            (ctypes.POINTER(core.BNFirmwareNinjaFunctionMemoryAccesses)))()
+        return list(self.iter_function_memory_accesses(progress_func))
+
+    def iter_function_memory_accesses(
+        self,
+        progress_func: Callable = None
+    ) -> Iterator[FirmwareNinjaFunctionMemoryAccesses]:
+        """
+        ``iter_function_memory_accesses`` runs the same analysis as ``get_function_memory_accesses``, but converts the
+        results for each function only when the iterator reaches it. The analysis itself runs before this method
+        returns. The core's results are released once the iterator is exhausted, closed or garbage collected.
+
+        :param callback progress_func: optional function to be called with the current progress and total count.
+        :return: Iterator over function memory accesses
+        :rtype: Iterator[FirmwareNinjaFunctionMemoryAccesses]
+        """
+
+        fma_info, count = self._get_function_memory_accesses(progress_func)
+        convert = FirmwareNinjaFunctionMemoryAccesses.from_BNFirmwareNinjaFunctionMemoryAccesses
+        view = self._view
+        return _iter_then_free(
+            (convert(fma_info[i].contents, view) for i in range(count)),
+            core.BNFirmwareNinjaFreeFunctionMemoryAccesses, fma_info, count)
+
+    def get_and_store_function_memory_accesses(self, progress_func: Callable = None) -> None:
+        """
+        ``get_and_store_function_memory_accesses`` runs the same analysis as ``get_function_memory_accesses`` and saves
+        the results to binary view metadata. It is equivalent to
+        ``store_function_memory_accesses(get_function_memory_accesses())``, but the results are handed from one core
+        call to the next without being converted to Python objects and back.
+
+        :Example:
+
+            >>> fwn = FirmwareNinja(bv)
+            >>> fwn.get_and_store_function_memory_accesses()
+            >>> fma = fwn.query_function_memory_accesses()
+
+        :param callback progress_func: optional function to be called with the current progress and total count.
+        :return: None
+        :rtype: None
+        """
+
+        fma_info, count = self._get_function_memory_accesses(progress_func)
+        try:
+            core.BNFirmwareNinjaStoreFunctionMemoryAccessesToMetadata(
+                self._handle, fma_info, count)
+        finally:
+            core.BNFirmwareNinjaFreeFunctionMemoryAccesses(fma_info, count)
+
+    def _get_function_memory_accesses(self, progress_func: Optional[Callable]):
+        fma_info = _PPFMA()
         if progress_func is None:
-            progress_cfunc = ctypes.CFUNCTYPE(
-                ctypes.c_bool, ctypes.c_void_p, ctypes.c_ulonglong,
-                ctypes.c_ulonglong)(lambda ctxt, cur, total: True)
+            progress_cfunc = _NO_PROGRESS
         else:
-            progress_cfunc = ctypes.CFUNCTYPE(
-                ctypes.c_bool, ctypes.c_void_p, ctypes.c_ulonglong,
-                ctypes.c_ulonglong)(
-                    lambda ctxt, cur, total: progress_func(cur, total))
+            progress_cfunc = _ProgressFunction(
+                lambda ctxt, cur, total: progress_func(cur, total))
 
         count = core.BNFirmwareNinjaGetFunctionMemoryAccesses(
             self._handle, ctypes.byref(fma_info), progress_cfunc, None)
         if count == -1:
             raise RuntimeError("BNFirmwareNinjaGetFunctionMemoryAccesses")
 
-        try:
-            fma_info_list = []
-            for i in range(count):
-                fma_info_list.append(
-                    FirmwareNinjaFunctionMemoryAccesses.
-                    from_BNFirmwareNinjaFunctionMemoryAccesses(
-                        fma_info[i].contents, self._view))
-
-            return fma_info_list
-        finally:
-            core.BNFirmwareNinjaFreeFunctionMemoryAccesses(fma_info, count)
+        return fma_info, count
 
     def _fma_info_list_to_array(
             self,
-            fma: list[FirmwareNinjaFunctionMemoryAccesses]) -> ctypes.POINTER:
-        fma_info_ptr_array = (
-            ctypes.POINTER(core.BNFirmwareNinjaFunctionMemoryAccesses) *
-            len(fma))()
-        for i, info in enumerate(fma):
-            accesses_ptr_array = (
-                ctypes.POINTER(core.BNFirmwareNinjaMemoryAccess) *
-                len(info.accesses))()
-            for j, access in enumerate(info.accesses):
-                accesses_ptr_array[j] = ctypes.pointer(
-                    FirmwareNinjaMemoryAccess.to_BNFirmwareNinjaMemoryAccess(
-                        access))
-
-            fma_info_struct = core.BNFirmwareNinjaFunctionMemoryAccesses(
-                start=info.function.start,
-                count=len(info.accesses),
-                accesses=accesses_ptr_array,
-            )
-
-            fma_info_ptr_array[i] = ctypes.pointer(fma_info_struct)
-
-        return fma_info_ptr_array
+            fma: list[FirmwareNinjaFunctionMemoryAccesses]) -> tuple[ctypes.Array, tuple]:
+        # Every memory access of every function is staged in one contiguous array, alongside a parallel array of
+        # pointers into it. Each function's ``accesses`` field points at its slice of the pointer array. The
+        # returned backing arrays must be kept alive for as long as the core may read the pointer array.
+        total = sum(len(info.accesses) for info in fma)
+        access_size = ctypes.sizeof(core.BNFirmwareNinjaMemoryAccess)
+        pointer_size = ctypes.sizeof(ctypes.c_void_p)
+        flat = (core.BNFirmwareNinjaMemoryAccess * total)()
+        flat_address = ctypes.addressof(flat)
+        flat_ptrs = (ctypes.c_void_p * total)(
+            *range(flat_address, flat_address + total * access_size, access_size))
+        flat_ptrs_address = ctypes.addressof(flat_ptrs)
+
+        fma_infos = (core.BNFirmwareNinjaFunctionMemoryAccesses * len(fma))()
+        fma_info_ptr_array = (_PFMA * len(fma))()
+
+        cast = ctypes.cast
+        pointer = ctypes.pointer
+        access_ptr_array_type = _PPMA
+        mem_address_to_core = FirmwareNinjaMemoryAccess._mem_address_to_core_struct
+        value_to_core = FirmwareNinjaMemoryAccess._value_to_core_struct
+        k = 0
+        for i in range(len(fma)):
+            info = fma[i]
+            accesses = info.accesses
+            count = len(accesses)
+            fma_info = fma_infos[i]
+            fma_info.start = info.function.start
+            fma_info.count = count
+            fma_info.accesses = cast(flat_ptrs_address + k * pointer_size, access_ptr_array_type)
+            for j in range(count):
+                access = accesses[j]
+                raw = flat[k + j]
+                raw.instrAddress = access.instr_address
+                raw.memAddress = mem_address_to_core(access)
+                raw.heuristic = access.heuristic
+                raw.type = access.type
+                raw.value = value_to_core(access)
+            k += count
+
+            fma_info_ptr_array[i] = pointer(fma_info)
+
+        return fma_info_ptr_array, (flat, flat_ptrs, fma_infos)
 
     def store_function_memory_accesses(
             self, fma: list[FirmwareNinjaFunctionMemoryAccesses]) -> None:
@@ -523,7 +747,7 @@ class FirmwareNinja:
         :rtype: None
         """
 
-        fma_info_ptr_array = self._fma_info_list_to_array(fma)
+        fma_info_ptr_array, fma_backing = self._fma_info_list_to_array(fma)
         core.BNFirmwareNinjaStoreFunctionMemoryAccessesToMetadata(
             self._handle, fma_info_ptr_array, len(fma))
 
@@ -536,8 +760,7 @@ class FirmwareNinja:
         :rtype: list[FirmwareNinjaFunctionMemoryAccesses]
         """
 
-        fma = ctypes.POINTER(
-            (ctypes.POINTER(core.BNFirmwareNinjaFunctionMemoryAccesses)))()
+        fma = _PPFMA()
         count = core.BNFirmwareNinjaQueryFunctionMemoryAccessesFromMetadata(
             self._handle, ctypes.byref(fma))
         if count == -1:
@@ -574,23 +797,20 @@ class FirmwareNinja:
         :rtype: list[FirmwareNinjaDeviceAccesses]
         """
 
-        fma_info_ptr_array = self._fma_info_list_to_array(fma)
-        device_accesses = ctypes.POINTER(core.BNFirmwareNinjaDeviceAccesses)()
+        fma_info_ptr_array, fma_backing = self._fma_info_list_to_array(fma)
+        device_accesses = _PDeviceAccesses()
         count = core.BNFirmwareNinjaGetBoardDeviceAccesses(
             self._handle, fma_info_ptr_array, len(fma),
-            ctypes.byref(device_accesses), self._view.arch.handle)
+            ctypes.byref(device_accesses), self._arch_handle)
         if count == -1:
             raise RuntimeError("BNFirmwareNinjaGetBoardDeviceAccesses")
 
         try:
             device_accesses_list = []
-            for i in range(count):
-                device_accesses_list.append(
-                    FirmwareNinjaDeviceAccesses(
-                        board_name=device_accesses[i].name,
-                        total=device_accesses[i].total,
-                        unique=device_accesses[i].unique,
-                    ))
+            append = device_accesses_list.append
+            device_access = FirmwareNinjaDeviceAccesses
+            for a in _as_array(device_accesses, count):
+                append(device_access(a.name, a.total, a.unique))
 
             return device_accesses_list
         finally:
@@ -619,29 +839,31 @@ class FirmwareNinja:
         value = ctypes.pointer(
             ctypes.c_uint64(value)) if value is not None else None
 
+        fma_len = len(fma) if fma else 0
         fma_info_ptr_array = None
-        if fma is not None and len(fma) > 0:
-            fma_info_ptr_array = self._fma_info_list_to_array(fma)
+        fma_backing = None
+        if fma_len > 0:
+            fma_info_ptr_array, fma_backing = self._fma_info_list_to_array(fma)
 
         if isinstance(location, FirmwareNinjaDevice):
             bn_node = core.BNFirmwareNinjaGetMemoryRegionReferenceTree(
                 self._handle, location.start, location.start + location.size,
-                fma_info_ptr_array, len(fma), value)
+                fma_info_ptr_array, fma_len, value)
         elif isinstance(location, Function):
             bn_node = core.BNFirmwareNinjaGetAddressReferenceTree(
-                self._handle, location.start, fma_info_ptr_array, len(fma),
+                self._handle, location.start, fma_info_ptr_array, fma_len,
                 value)
         elif isinstance(location, Section):
             bn_node = core.BNFirmwareNinjaGetMemoryRegionReferenceTree(
                 self._handle, location.start, location.start + location.length,
-                fma_info_ptr_array, len(fma), value)
+                fma_info_ptr_array, fma_len, value)
         elif isinstance(location, DataVariable):
             bn_node = core.BNFirmwareNinjaGetAddressReferenceTree(
-                self._handle, location.address, fma_info_ptr_array, len(fma),
+                self._handle, location.address, fma_info_ptr_array, fma_len,
                 value)
         elif isinstance(location, int):
             bn_node = core.BNFirmwareNinjaGetAddressReferenceTree(
-                self._handle, location, fma_info_ptr_array, len(fma), value)
+                self._handle, location, fma_info_ptr_array, fma_len, value)
         else:
             raise ValueError("Invalid location type")
 